@@ -1,8 +1,10 @@
+import os
+import numpy as np
 import primesieve
 from itertools import combinations_with_replacement
-from math import floor, sqrt
+from math import floor, sqrt, isqrt
 
-def minsqrsum(n, maxtry=8):
+def minsqrsum_combos(n, maxtry=8):
     """Return a list n+1 long; array[n] is the least number of squares of primes or 1
     to sum to n, or 0 if more than maxtry are required."""
     last = floor(sqrt(n))
@@ -16,8 +18,137 @@ def minsqrsum(n, maxtry=8):
                 numsum[val] = notzero 
     return numsum
 
-numsum = minsqrsum(10000)
-out = open('b096436.txt', 'wt')
-for i, n in enumerate(numsum[1:], start=1): 
-     print(i, n, file=out)
-out.close()     
+def _addsquare(cnt, s, cap):
+    """Allow any number of extra terms s: cnt[v] = min(cnt[v], cnt[v - s] + 1), in place"""
+    # This chains along each residue class mod s.
+    n = len(cnt) - 1
+    if s * s <= n:
+        # Long chains: in rows of length s, cnt[k] = min over j <= k of cnt[j] + (k - j),
+        # which is a running minimum of cnt[j] - j.
+        rows = -(-(n + 1) // s)
+        mat = np.full(rows * s, cap, dtype=np.int32)
+        mat[:n+1] = cnt
+        mat = mat.reshape(rows, s)
+        k = np.arange(rows, dtype=np.int32)[:, None]
+        mat -= k
+        np.minimum.accumulate(mat, axis=0, out=mat)
+        mat += k
+        cnt[:] = np.minimum(mat.ravel()[:n+1], cap)
+    else:
+        # Few rows: update one row at a time from the row before.
+        tmp = np.empty(s, dtype=np.uint8)
+        for lo in range(s, n + 1, s):
+            prev = cnt[lo-s:min(lo, n+1-s)]
+            cur = cnt[lo:lo+len(prev)]
+            t = tmp[:len(prev)]
+            np.add(prev, 1, out=t)
+            np.minimum(cur, t, out=cur)
+
+def minsqrsum(n, maxtry=8):
+    """Return a uint8 array n+1 long; array[n] is the least number of squares of primes or 1
+    to sum to n, or 0 if more than maxtry are required."""
+    # Coin-change: after using the squares seen so far, cnt[v] is the fewest terms
+    # summing to v (capped at maxtry + 1).
+    squares = [1] + [p*p for p in primesieve.primes(isqrt(n))]
+    cap = maxtry + 1
+    cnt = np.full(n + 1, cap, dtype=np.uint8)
+    cnt[0] = 0
+    for s in squares:
+        _addsquare(cnt, s, cap)
+    cnt[cnt == cap] = 0
+    return cnt
+
+def _lastline(fname, block=1<<16):
+    """(index, value) on the last complete line of a b-file, dropping any partial line after it"""
+    if not os.path.exists(fname):
+        return 0, 0
+    with open(fname, 'r+b') as f:
+        # read back from the end only until there are two newlines: the last line's and the one before
+        pos, tail = f.seek(0, os.SEEK_END), b''
+        while pos and tail.count(b'\n') < 2:
+            step = min(block, pos)
+            pos -= step
+            f.seek(pos)
+            tail = f.read(step) + tail
+        end = tail.rfind(b'\n') + 1
+        f.truncate(pos + end)
+    last = tail[:end].rstrip(b'\n').rsplit(b'\n', 1)[-1].split()
+    return (int(last[0]), int(last[1])) if last else (0, 0)
+
+def _rebuild(hist, bfile, done, cap, block=1<<24):
+    """Refill hist[1:done+1] from the b-file (0 there means more than maxtry, so cap here)"""
+    with open(bfile, 'rb') as f:
+        rest = b''
+        while True:
+            data = f.read(block)
+            if not data:
+                break
+            data = rest + data
+            end = data.rfind(b'\n') + 1
+            rest = data[end:]
+            pairs = np.array(data[:end].split(), dtype=np.int64).reshape(-1, 2)
+            pairs = pairs[pairs[:, 0] <= done]
+            vals = pairs[:, 1].astype(np.uint8)
+            vals[vals == 0] = cap
+            hist[pairs[:, 0]] = vals
+
+def minsqrsum_segmented(n, bfile='b096436.txt', countfile='b096436.cnt',
+                        maxtry=8, width=1<<20):
+    """
+    Write the b-file for minsqrsum up through n, one window [lo, hi) at a time.
+    Counts so far are kept (one byte each) in a memory-mapped countfile,
+    so memory stays around a few windows' worth. Resumes after the last line of the b-file.
+    """
+    # Taking the terms of a sum in increasing order, the partial sums below lo are final,
+    # so each window only has to add the squares below hi to what came before it.
+    cap = maxtry + 1
+    done, last = _lastline(bfile)
+    if done >= n:
+        return
+    if os.path.exists(countfile):
+        if os.path.getsize(countfile) < n + 1:
+            os.truncate(countfile, n + 1)
+        hist = np.memmap(countfile, dtype=np.uint8, mode='r+')[:n + 1]
+    else:
+        hist = np.memmap(countfile, dtype=np.uint8, shape=n + 1, mode='w+')
+    hist[0] = 0
+    # The count file is written ahead of the b-file, so it should have the b-file's last
+    # term; if not (missing, or from a shorter run), rebuild it from the b-file.
+    if done and hist[done] != (last or cap):
+        _rebuild(hist, bfile, done, cap)
+        hist.flush()
+    squares = [1] + [p*p for p in primesieve.primes(isqrt(n))]
+    with open(bfile, 'at') as out:
+        for lo in range(done + 1, n + 1, width):
+            hi = min(lo + width, n + 1)
+            win = np.full(hi - lo, cap, dtype=np.uint8)
+            for s in squares:
+                if s >= hi:
+                    break
+                if s < hi - lo:
+                    # terms s can chain inside the window; start from the row before it
+                    start = max(lo - s, 0)
+                    ext = np.concatenate((hist[start:lo], win))
+                    _addsquare(ext, s, cap)
+                    win = ext[lo-start:]
+                else:
+                    part = win[max(s - lo, 0):]
+                    np.minimum(part, hist[max(lo - s, 0):hi - s] + 1, out=part)
+            hist[lo:hi] = win
+            hist.flush()
+            win[win == cap] = 0
+            out.writelines(f'{i} {c}\n' for i, c in enumerate(win.tolist(), start=lo))
+            out.flush()
+
+# minsqrsum_combos(10000): 32s
+# minsqrsum(10**5): 0.013s; minsqrsum(10**6): 0.15s; minsqrsum(10**7): 2.9s
+# minsqrsum_segmented(10**7), including writing the b-file: 6.6s
+
+if __name__ == "__main__":
+    import sys
+    if len(sys.argv) > 1:
+        minsqrsum_segmented(int(sys.argv[1]))
+        sys.exit()
+    numsum = minsqrsum(10000)
+    with open('b096436.txt', 'wt') as out:
+        out.writelines(f'{i} {n}\n' for i, n in enumerate(numsum[1:].tolist(), start=1))
@@ -1,13 +1,11 @@
 # minimal extract of josephus-save-first-n.py for inclusion in OEIS
 
 def savesfirstn(n, q):
-    circle = list(range(2*n))
     i = 0
-    while len(circle) > n:
-        i = (i + q - 1) % len(circle)
-        if circle[i] < n:
+    for m in range(2*n, n, -1):
+        i = (i + q - 1) % m
+        if i < n:
             return False
-        del circle[i]
     return True
 for n in range(1, 22):
     q = n + 1
@@ -5,6 +5,8 @@ by B. Datta and S. Gupta, arXiv:1806.11393 or http://dx.doi.org/10.1007/s00454-0
 Discrete & Computational Geometry 65, 531--553.
 """
 import itertools
+from math import lcm
+import numpy as np
 
 def is_sublist(seq1, seq2):
     """Does seq1 occur in cyclic order in seq2?"""
@@ -17,24 +19,26 @@ def is_sublist(seq1, seq2):
             return True
     return False
 
+def cyclic_grams(seq, k):
+    """Set of all tuples of length k occurring in cyclic order in seq"""
+    # is_sublist(t, seq) is the same as t in cyclic_grams(seq, len(t))
+    m = len(seq)
+    return {tuple(seq[(i+j) % m] for j in range(k)) for i in range(m)}
+
 def angle_sum(seq):
     return sum((k-2)/k for k in seq)
 
 def dg_cond_a(seq):
-    n = len(seq)
-    for i in range(n):
-        if not is_sublist((seq[(i + 1) % n], seq[i]), seq):
-            return False
-    return True
+    twos = cyclic_grams(seq, 2)
+    return all((y,x) in twos for x,y in twos)
 
 def dg_cond_b(seq):
-    n = len(seq)
-    twoples = {(seq[i], seq[(i+1) % n]) for i in range(n)}
-    for x,y in twoples:
-        for w,z in twoples:
-            if y == w:
-                if not is_sublist((x,y,z), seq):
-                    return False
+    twos = cyclic_grams(seq, 2)
+    threes = cyclic_grams(seq, 3)
+    for x,y in twos:
+        for w,z in twos:
+            if y == w and (x,y,z) not in threes:
+                return False
     return True
 
 def dg_ok(seq):
@@ -43,18 +47,44 @@ def dg_ok(seq):
 # e.g. all valid types of degree 4 with polygon sizes up to 7 
 s4 = [z for z in itertools.product(range(4,8), repeat=4) if dg_ok(z)]
 
+def necklaces(n, lo, hi, first=None):
+    """
+    Sequences of length n from range(lo, hi) which are least among their rotations,
+    in lexicographic order, omitting those which can't have angle_sum > 2.
+    If first is given, only those starting with it (i.e. with least element first).
+    """
+    # Generation of prenecklaces by Fredricksen-Kessler-Maiorana, as in Ruskey's recursive form:
+    # a[t] repeats a[t-p] to continue a period p prefix, or exceeds it to start a new Lyndon prefix.
+    # Each angle (k-2)/k increases with k; they are kept exactly, as multiples of 1/L.
+    a = [0] * (n + 1)
+    L = lcm(*range(lo, hi))
+    angle = {k: L - 2*L//k for k in range(lo, hi)}
+    def gen(t, p, asum):
+        if t > n:
+            if n % p == 0:
+                yield tuple(a[1:])
+            return
+        start = a[t-p] if t > 1 else lo
+        for k in range(start, hi) if t > 1 or first is None else (first,):
+            newsum = asum + angle[k]
+            if newsum + (n - t) * angle[hi-1] < 2*L:
+                continue
+            a[t] = k
+            yield from gen(t + 1, p if k == start and t > 1 else t, newsum)
+    yield from gen(1, 1, 0)
+
 def ok_seqs(n, is_ok=dg_ok):
     """All ok sequences of length n, removing cyclic repetitions"""
+    # Each class of rotations is represented by its least element
     top = max(5, 4 + n//2)
-    seqs = [z for z in itertools.product(range(4,top), repeat=n) if is_ok(z)]
-    uniqs = []
-    for s in seqs:
-        for u in uniqs:
-            if is_sublist(s, u):
-                break
-        else:
-            uniqs.append(s)
-    return uniqs
+    if is_ok in batch_forms:
+        cands = np.array(list(necklaces(n, 4, top)), dtype=np.int64).reshape(-1, n)
+        return [tuple(z) for z in cands[batch_forms[is_ok](cands)].tolist()]
+    return [z for z in necklaces(n, 4, top) if is_ok(z)]
+
+# ok_seqs(8): 1.0s with product and pairwise is_sublist, 0.2s with necklaces
+# ok_seqs(10): 25s testing one at a time (2.1s of it generating necklaces), 4.7s with dg_ok_batch
+# ok_seqs(10, dg_newok): 43s one at a time, 15s with dg_newok_batch
 
 def vtype(seq):
     """vertex type coded with letters for differing k_i"""
@@ -69,16 +99,165 @@ def ok_vtypes(n, is_ok=dg_ok):
 # old (A) is removed; (B) is the same except that xy "appears" now means
 # either xy or yx appears.
 def dg_newa(seq):
-    n = len(seq)
-    rot = seq[1:] + seq[:1]
-    twoples = set(zip(seq, rot)) | set(zip(rot, seq))
+    twos = cyclic_grams(seq, 2)
+    twoples = twos | {(y,x) for x,y in twos}
+    threes = cyclic_grams(seq, 3)
     for x,y in twoples:
         for w,z in twoples:
             if y == w:
-                if not (is_sublist((x,y,z), seq) or is_sublist((z,y,x), seq)):
+                if (x,y,z) not in threes and (z,y,x) not in threes:
                     return False
     return True
 
 def dg_newok(seq):
     return angle_sum(seq) > 2 and dg_newa(seq)
 
+
+# Batch forms: screen a 2-d array of candidates (one sequence per row) at once.
+# The polygon sizes are renumbered 0..a-1, so each cyclic k-gram of a row has a code below a**k,
+# and each row gets a table of which codes occur; every test is then a lookup in that table.
+
+CHUNK = 1 << 14  # rows at a time, to bound the size of the tables
+
+def _codes(seqs, k, a):
+    """Codes of the cyclic k-grams of each row, starting at each position"""
+    code = np.zeros(seqs.shape, dtype=np.intp)
+    for j in range(k):
+        code = code * a + np.roll(seqs, -j, axis=1)
+    return code
+
+def _gramtable(seqs, k, a):
+    """Boolean array: does code c occur among the cyclic k-grams of row i?"""
+    table = np.zeros((len(seqs), a**k), dtype=bool)
+    table[np.arange(len(seqs))[:, None], _codes(seqs, k, a)] = True
+    return table
+
+def _screen(test, seqs):
+    """Boolean array of test(rows, a) over blocks of rows, after renumbering"""
+    seqs = np.asarray(seqs)
+    vals = np.unique(seqs)
+    seqs = np.searchsorted(vals, seqs)
+    out = np.zeros(len(seqs), dtype=bool)
+    for i in range(0, len(seqs), CHUNK):
+        out[i:i+CHUNK] = test(seqs[i:i+CHUNK], len(vals))
+    return out
+
+def _cond_a(seqs, a):
+    twos = _gramtable(seqs, 2, a)
+    rev = np.roll(seqs, -1, axis=1) * a + seqs
+    return twos[np.arange(len(seqs))[:, None], rev].all(axis=1)
+
+def _cond_b(x, y, seqs, a):
+    """For all pairs of 2-grams xy, wz (xy in both arrays) with y == w: does xyz occur?"""
+    threes = _gramtable(seqs, 3, a)
+    rows = np.arange(len(seqs))[:, None, None]
+    code = (x[:, :, None] * a + y[:, :, None]) * a + y[:, None, :]
+    match = y[:, :, None] == x[:, None, :]
+    return threes[rows, code], match
+
+def angle_sum_batch(seqs):
+    """Boolean array: angle_sum > 2 for each row, compared exactly"""
+    # sum (k-2)/k > 2  <=>  sum L/k < L*(n-2)/2  with L the lcm of all the k
+    seqs = np.asarray(seqs, dtype=np.int64)
+    n = seqs.shape[1]
+    L = lcm(*np.unique(seqs).tolist())
+    if 2 * L * n >= 1 << 63:
+        # the lcm of sizes up to 43 or so is too big for int64; use Python ints
+        seqs = seqs.astype(object)
+    return 2 * (L // seqs).sum(axis=1) < L * (n - 2)
+
+def dg_cond_a_batch(seqs):
+    return _screen(_cond_a, seqs)
+
+def dg_cond_b_batch(seqs):
+    def test(seqs, a):
+        found, match = _cond_b(seqs, np.roll(seqs, -1, axis=1), seqs, a)
+        return (found | ~match).all(axis=(1, 2))
+    return _screen(test, seqs)
+
+def dg_newa_batch(seqs):
+    def test(seqs, a):
+        nxt = np.roll(seqs, -1, axis=1)
+        x, y = np.hstack((seqs, nxt)), np.hstack((nxt, seqs))  # pairs in both orders
+        found, match = _cond_b(x, y, seqs, a)
+        # pair i reversed is pair i+k (mod 2k), and z,y,x is found for the reversed pairs swapped
+        rev = np.roll(np.arange(x.shape[1]), -seqs.shape[1])
+        rfound = found[:, rev][:, :, rev].transpose(0, 2, 1)
+        return (found | rfound | ~match).all(axis=(1, 2))
+    return _screen(test, seqs)
+
+def _ok_batch(seqs, tests):
+    """Screen with each test in turn, only passing on the survivors"""
+    seqs = np.asarray(seqs)
+    ok = np.ones(len(seqs), dtype=bool)
+    for test in tests:
+        which = np.flatnonzero(ok)
+        if which.size:
+            ok[which] = test(seqs[which])
+    return ok
+
+def dg_ok_batch(seqs):
+    return _ok_batch(seqs, (angle_sum_batch, dg_cond_a_batch, dg_cond_b_batch))
+
+def dg_newok_batch(seqs):
+    return _ok_batch(seqs, (angle_sum_batch, dg_newa_batch))
+
+batch_forms = {dg_ok: dg_ok_batch, dg_newok: dg_newok_batch}
+
+# Census of vertex types: for each degree n and largest polygon size, how many ok sequences
+# (up to rotation) have each vertex type, under both dg_ok and dg_newok.
+# Finished cells are kept in a JSON file, so only new cells are ever computed.
+
+import json
+import os
+from collections import Counter
+
+def _census_shard(args):
+    """Counts of vertex types for the ok sequences of length n, sizes up to top, starting at first"""
+    n, top, first = args
+    cands = np.array(list(necklaces(n, 4, top + 1, first)), dtype=np.int64).reshape(-1, n)
+    counts = {}
+    for is_ok in (dg_ok, dg_newok):
+        oks = cands[batch_forms[is_ok](cands)]
+        counts[is_ok.__name__] = Counter(''.join(vtype(s)) for s in oks.tolist())
+    return counts
+
+def census(degrees, top=None, cachefile='dattagupta-census.json', procs=None):
+    """
+    Return the census table {'n,top': {'dg_ok': {vtype: count}, 'dg_newok': {...}}} for the
+    given degrees, with polygons of size up to top (default as in ok_seqs, i.e. max(4, 3 + n//2)).
+    Each cell is split by least polygon size over a process pool and saved as soon as it is done.
+    """
+    from multiprocessing import Pool
+    table = {}
+    if os.path.exists(cachefile):
+        with open(cachefile) as f:
+            table = json.load(f)
+    cells = [(n, top or max(4, 3 + n//2)) for n in degrees]
+    todo = [(n, t) for n, t in cells if f'{n},{t}' not in table]
+    if todo:
+        with Pool(procs) as pool:
+            for n, t in todo:
+                total = {'dg_ok': Counter(), 'dg_newok': Counter()}
+                for counts in pool.imap_unordered(_census_shard, [(n, t, k) for k in range(4, t + 1)]):
+                    for name in total:
+                        total[name].update(counts[name])
+                table[f'{n},{t}'] = {name: dict(sorted(c.items())) for name, c in total.items()}
+                tmp = cachefile + '.tmp'
+                with open(tmp, 'wt') as f:
+                    json.dump(table, f, indent=1)
+                os.replace(tmp, cachefile)
+                print(f'{n},{t}:', *(f'{name} {sum(c.values())}' for name, c in total.items()), flush=True)
+    return {f'{n},{t}': table[f'{n},{t}'] for n, t in cells}
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description='Count vertex types of each degree, caching the results.')
+    parser.add_argument('degrees', type=int, nargs='+')
+    parser.add_argument('-t', '--top', type=int, help='largest polygon size (default depends on degree)')
+    parser.add_argument('-c', '--cache', default='dattagupta-census.json')
+    parser.add_argument('-p', '--procs', type=int, help='number of worker processes (default: all cores)')
+    args = parser.parse_args()
+    for cell, counts in census(args.degrees, args.top, args.cache, args.procs).items():
+        for name, c in counts.items():
+            print(cell, name, ' '.join(f'{v}:{k}' for v, k in c.items()))
@@ -1,5 +1,13 @@
+import argparse
+from glob import glob
+from math import log10
+import os
+from time import monotonic
+import numpy as np
 import primesieve
 import signal
+from riecaman import PBLOCK, advance
+from runner import open_store, bounds, lengths, record, import_seq
 
 def sigtrunc(n, ndig=2):
     pten = int(log10(n)) - ndig + 1
@@ -16,110 +24,160 @@ def deferint(signum, frame):
 listsize = 1000
 listfile = f'list{listsize}'
 
-knownmin = {6: sigtrunc(34883724378113),
-           20: sigtrunc(14494027971804),
-           50: sigtrunc(2430951489536),
-           51: sigtrunc(2413771620352),
-           70: sigtrunc(3030206900989),
-           92: sigtrunc(2860448219136),
-          118: sigtrunc(51539607553),
-          119: sigtrunc(51539607553),
-          153: sigtrunc(51539607552),
-          158: sigtrunc(51539607552),
-          188: sigtrunc(51539607553),
-          225: sigtrunc(51539607552),
-          274: sigtrunc(51539607553),
-          322: sigtrunc(51539607552),
-          367: sigtrunc(55270046519),
-          426: sigtrunc(53697944843),
-          429: sigtrunc(52711637523),
-          487: sigtrunc(53615087568),
-          491: sigtrunc(54278928220),
-          498: sigtrunc(53578571870),
-          559: sigtrunc(52523334337),
-          635: sigtrunc(61203857912),
-          702: sigtrunc(56344193395),
-          707: sigtrunc(53494306157),
-          708: sigtrunc(54650454751),
-          869: sigtrunc(53693029487),
-          954: sigtrunc(54401351812),
-          955: sigtrunc(53637558102),
-          956: sigtrunc(52528392832)}
-
-pit = primesieve.Iterator()
-traj = []
-found = set()
-length = []
+parser = argparse.ArgumentParser(description=f'Write {listfile}, tracking the unresolved start values until interrupted.')
+parser.add_argument('--resume', action='store_true', help='carry on from the snapshot file')
+parser.add_argument('-s', '--snapshot', default=f'lister{listsize}.state', help='where to save the tracker state')
+parser.add_argument('--fresh', action='store_true', help='start over even if there is a snapshot file, replacing it')
+parser.add_argument('-e', '--every', type=float, default=600, help='seconds between snapshots')
+parser.add_argument('-d', '--db', default='riecaman.db', help='results database of runner.py, for lengths and lower bounds')
+args = parser.parse_args()
+if os.path.exists(args.snapshot) and not (args.resume or args.fresh):
+    parser.error(f'{args.snapshot} exists; use --resume to carry on from it, or --fresh to replace it')
+def save_state(snapfile, **arrays):
+    """Write the arrays to snapfile, replacing it only once they're all written"""
+    tmp = snapfile + '.tmp'
+    with open(tmp, 'wb') as sf:
+        np.savez(sf, **arrays)
+    os.replace(tmp, snapfile)
+
+def find(parent, n):
+    """Representative (least start) of the trajectory n has joined"""
+    while parent[n] != n:
+        parent[n] = parent[parent[n]]
+        n = parent[n]
+    return n
+
+def union(parent, length, a, b):
+    """Record that the sequences from a and b coincide from some step on; returns the representative"""
+    a, b = find(parent, a), find(parent, b)
+    if a > b:
+        a, b = b, a
+    if a != b:
+        parent[b] = a
+        if b in length:
+            length[a] = length.pop(b)
+    return a
+
+# Any y whose sequence only goes down, y - 2 - 3 - ... - p_i, until it meets the one from x
+# at step i ends up the same: it's the same sequence from there on.
+parent = {}
+length = {}  # keyed by representative
+reps = []
+smallprimes = primesieve.primes(listsize + 2)
 for x in range(listsize + 1):
-    if x in found:
+    if x in parent:
         continue
+    parent[x] = x
+    reps.append(x)
+    start = x
     sump = 0
-    pit.skipto(1)
-    starts = {x}
     i = 0
     while sump < listsize - x:
+        p = smallprimes[i]
         i += 1
-        p = pit.next_prime()
         sump += p
         if x > p:
             x -= p
         elif x < p:
             x += p
             if x + sump <= listsize:
-                starts.add(x + sump)
+                if x + sump in parent:
+                    union(parent, length, start, x + sump)
+                else:
+                    parent[x + sump] = start
         else:
-            length.append(i)
+            length[find(parent, start)] = i
             break
-    else: # no break
-        length.append(None)
-    traj.append(starts)
-    found.update(starts)
 
-doit = [min(t) for t,l in zip(traj,length) if l is None]
+# whatever runner.py (or riecamanN, imported into it) has settled
+newdb = not os.path.exists(args.db)
+db = open_store(args.db)
+if not db.execute('SELECT count(*) FROM starts').fetchone()[0]:
+    # a new store: start it off with the riecamanN output that comes with this
+    seqfiles = sorted(glob(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'seq[0-9]*')))
+    if not seqfiles:
+        db.close()
+        if newdb:
+            os.remove(args.db)
+        parser.error(f'{args.db} is empty and there are no seqN files to import; see runner.py --import')
+    print(f'Importing {len(seqfiles)} seqN files into {args.db}')
+    for seqfile in seqfiles:
+        import_seq(db, seqfile)
+for n, l in lengths(db).items():
+    if n in parent:
+        length.setdefault(find(parent, n), l)
+knownmin = bounds(db)
+
+doit = sorted({find(parent, x) for x in reps} - set(length))
 
 step = 0
-pit.skipto(1)
-thelength = {}
-startns = doit.copy()
-blah = doit.copy()
+lo = 2
+startns = np.array(doit, dtype=np.int64)
+blah = startns.copy()
+hitlog, mergelog = [], []  # what the second phase has found, to replay on resuming
 
+if args.resume:
+    with np.load(args.snapshot) as snap:
+        if snap['listsize'] != listsize:
+            parser.error(f"{args.snapshot} is for list size {snap['listsize']}")
+        step = int(snap['step'])
+        lo = int(snap['upto']) + 1  # like riecamanN's pit.skipto(last prime)
+        blah, startns = snap['vals'], snap['startns']
+        hitlog, mergelog = snap['hits'].tolist(), snap['merges'].tolist()
+    for n, l in hitlog:
+        length[n] = l
+    for a, b in mergelog:
+        union(parent, length, a, b)
+    print(f'Resuming at step {step}, {len(blah)} trajectories, primes past {lo - 1}')
+
+def snapshot():
+    save_state(args.snapshot, listsize=listsize, step=step, upto=lo - 1,
+               vals=blah, startns=startns,
+               hits=np.array(hitlog, dtype=np.int64).reshape(-1, 2),
+               merges=np.array(mergelog, dtype=np.int64).reshape(-1, 2))
+
+lastsave = monotonic()
 signal.signal(signal.SIGINT, deferint)
 while True:
-    p = pit.next_prime()
-    step += 1
-    torm = []
-    for i in range(len(blah)):
-        if blah[i] > p:
-            blah[i] -= p
-        elif blah[i] < p:
-            blah[i] += p
-        else:
-            torm.append(i)
-            thelength[startns[i]] = step
-            print(f'{startns[i]}: {step}')
-    for i in reversed(torm):
-        del blah[i]
-        del startns[i]
+    blah, startns, step, hits = advance(blah, startns, step, lo, lo + PBLOCK - 1)
+    lo += PBLOCK
+    for n, l in hits:
+        length[n] = l
+        hitlog.append((n, l))
+        print(f'{n}: {l}')
+    # two trajectories with the same value after the same number of steps are the same from
+    # then on; they're all at the same step after a block, so keep just one of each
+    if len(np.unique(blah)) < len(blah):
+        kept = {}
+        for t, (v, n) in enumerate(zip(blah.tolist(), startns.tolist())):
+            if v in kept:
+                r = union(parent, length, n, int(startns[kept[v]]))
+                mergelog.append((n, int(startns[kept[v]])))
+                print(f'{max(n, int(startns[kept[v]]))} = a({r}) from step {step} or before')
+                startns[kept[v]] = r
+            else:
+                kept[v] = t
+        keep = sorted(kept.values())
+        blah, startns = blah[keep], startns[keep]
+    if quitit or monotonic() - lastsave > args.every:
+        snapshot()
+        lastsave = monotonic()
     if quitit:
         break
 
 signal.signal(signal.SIGINT, signal.default_int_handler)
-defaultmin = sigtrunc(step)
+for n, l in hitlog:
+    record(db, n, length=l)
+for n, v in zip(startns.tolist(), blah.tolist()):
+    record(db, n, step=step, value=v, upto=lo - 1)
 
 with open(listfile, 'wt') as lout:
     for n in range(listsize + 1):
-        thetraj = next(t for t in traj if n in t)
-        minn = min(thetraj)
-        tind = traj.index(thetraj)
-        if minn in knownmin:
-            minstep = knownmin[minn]
-        else:
-            minstep = defaultmin
+        minn = find(parent, n)
+        minstep = sigtrunc(max(knownmin.get(minn, 0), step))
 
-        if length[tind] is not None:
-            print(f'{n} {length[tind]}', file=lout)
-        elif minn in thelength:
-            print(f'{n} {thelength[minn]}', file=lout)
+        if minn in length:
+            print(f'{n} {length[minn]}', file=lout)
         elif n != minn:
             print(f'{n} = a({minn}) > {minstep}', file=lout)
         else: 
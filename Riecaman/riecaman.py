@@ -0,0 +1,74 @@
+"""
+Stepping Riecaman trajectories: from n, at step i go down by the i-th prime if that stays
+positive, else up by it; the length of n is the step at which it would hit 0 exactly.
+"""
+import numpy as np
+import primesieve
+import primesieve.numpy
+
+PBLOCK = 1 << 24  # width of the ranges of primes the trajectories are stepped through at a time
+
+def advance_masked(vals, startns, step, lo, hi):
+    """Step every trajectory in vals through the primes in [lo, hi); returns the new state and the (start, length) hits"""
+    hits = []
+    for p in primesieve.primes(lo, hi):
+        step += 1
+        d = vals - p
+        if not d.all():
+            # compact the finished ones away
+            keep = d != 0
+            hits.extend((int(n), step) for n in startns[~keep])
+            vals, startns, d = vals[keep], startns[keep], d[keep]
+        vals = np.where(d > 0, d, vals + p)
+    return vals, startns, step, hits
+
+def advance(vals, startns, step, lo, hi, mins=None):
+    """Same as advance_masked, but a whole descent at a time, as in riecamanN.cc;
+    appends (start, step, value, next prime) to mins at each minimum, if given"""
+    # Once a value x is below the next prime p, with q after it, it goes x + p - q = x - (q - p)
+    # two steps later as long as x > q - p: it descends by the gaps of every other pair of primes,
+    # keeping its parity, until a minimum x <= q - p.  Then it's a hit if x == q - p (so only if
+    # x is even, past 2 and 3), else it goes up to x + p + q and back below the next prime.
+    # With prefix sums of every other gap, the minimum is one searchsorted away.
+    primes = primesieve.numpy.primes(lo, hi).astype(np.int64)
+    m = len(primes)
+    gaps = np.diff(primes)
+    sums = (np.cumsum(gaps[0::2]), np.cumsum(gaps[1::2]))  # pairs starting at even, odd indices
+    keep, newvals, hits = [], [], []
+    for t, x in enumerate(vals.tolist()):
+        i = 0
+        while i < m:
+            p = int(primes[i])
+            if x > p:
+                x -= p
+                i += 1
+                continue
+            if x == p:
+                hits.append((int(startns[t]), step + i + 1))
+                break
+            if i + 1 == m:
+                x += p
+                i += 1
+                continue
+            c, u0 = i & 1, i >> 1
+            csum = sums[c]
+            before = int(csum[u0 - 1]) if u0 else 0
+            u = int(np.searchsorted(csum, x + before))  # first pair whose gap is at least x by then
+            if u == len(csum):
+                x -= int(csum[-1]) - before
+                i = c + 2 * u
+                continue
+            x -= (int(csum[u - 1]) if u else 0) - before
+            j = c + 2 * u
+            if not x & 1 or j == 0:
+                if x == int(gaps[j]):
+                    hits.append((int(startns[t]), step + j + 2))
+                    break
+            if mins is not None:
+                mins.append((int(startns[t]), step + j, x, int(primes[j])))
+            x += int(primes[j] + primes[j + 1])
+            i = j + 2
+        else:
+            keep.append(t)
+            newvals.append(x)
+    return np.array(newvals, dtype=np.int64), startns[keep], step + m, hits
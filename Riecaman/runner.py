@@ -0,0 +1,146 @@
+"""
+Run many Riecaman start values at once, one worker at a time per start, in slices of a few
+minutes each, keeping what's known in an SQLite database: lengths of the starts that hit 0,
+and for the rest, how many steps they've been followed (with the state to carry on from),
+plus every minimum on the way, as riecamanN prints them.
+"""
+import os
+import re
+import signal
+import sqlite3
+from time import monotonic
+import numpy as np
+from riecaman import PBLOCK, advance
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS starts (
+    n INTEGER PRIMARY KEY,
+    length INTEGER,              -- NULL while unresolved
+    step INTEGER NOT NULL DEFAULT 0,  -- followed this far, so length > step
+    value INTEGER,               -- value after step steps,
+    upto INTEGER                 -- having used every prime up to here
+);
+CREATE TABLE IF NOT EXISTS mins (
+    n INTEGER,
+    step INTEGER,                -- value after step steps is a minimum,
+    value INTEGER,
+    prime INTEGER,               -- next prime
+    PRIMARY KEY (n, step)
+);
+'''
+
+def open_store(dbfile='riecaman.db'):
+    """Connection to the results database, creating the tables if need be"""
+    db = sqlite3.connect(dbfile)
+    db.executescript(SCHEMA)
+    return db
+
+def record(db, n, length=None, step=0, value=None, upto=None, mins=()):
+    """Add what a run found out about n, keeping whatever went further"""
+    with db:
+        db.execute('INSERT OR IGNORE INTO starts (n) VALUES (?)', (n,))
+        if length is not None:
+            db.execute('UPDATE starts SET length = ? WHERE n = ?', (length, n))
+        elif value is not None:
+            db.execute('UPDATE starts SET step = ?, value = ?, upto = ? WHERE n = ? AND step < ?',
+                       (step, value, upto, n, step))
+        else:
+            db.execute('UPDATE starts SET step = ? WHERE n = ? AND step < ?', (step, n, step))
+        db.executemany('INSERT OR IGNORE INTO mins VALUES (?, ?, ?, ?)', [(n, s, v, p) for s, v, p in mins])
+
+def lengths(db):
+    """{n: length} for every start known to hit 0"""
+    return dict(db.execute('SELECT n, length FROM starts WHERE length IS NOT NULL'))
+
+def bounds(db):
+    """{n: steps} for every unresolved start, which is known to take more steps than that"""
+    return dict(db.execute('SELECT n, step FROM starts WHERE length IS NULL'))
+
+def import_seq(db, filename, n=None):
+    """Load the output of riecamanN (a seqN file), for start n (by default, from the file name)"""
+    if n is None:
+        n = int(re.search(r'(\d+)$', filename).group(1))
+    best = (0, None, None)
+    mins = []
+    with open(filename) as sf:
+        for line in sf:
+            if m := re.match(r'\s*(\d+)\. (\d+): (\d+)$', line):
+                step, prime, value = map(int, m.groups())
+                best = max(best, (step, value, prime))
+            elif m := re.match(r'(\d+): >(\d+) steps, last prime (\d+), last value (\d+)', line):
+                if int(m[1]) == n:
+                    best = max(best, (int(m[2]), int(m[4]), int(m[3])))
+            elif m := re.match(r'(\d+): (\d+) steps?, last prime', line):
+                if int(m[1]) == n:
+                    record(db, n, length=int(m[2]))
+            elif m := re.match(r'Min at step (\d+): (\d+); \+ (\d+)', line):
+                mins.append(tuple(map(int, m.groups())))
+    step, value, prime = best
+    record(db, n, step=step, value=value, upto=prime, mins=mins)
+
+def run_start(task):
+    """Follow start n for about seconds; returns (n, length, step, value, upto, mins)"""
+    n, step, value, upto, seconds = task
+    if value is None:
+        step, value, upto = 0, n, 1
+    vals, startns = np.array([value], dtype=np.int64), np.array([n], dtype=np.int64)
+    mins = []
+    stop = monotonic() + seconds
+    while monotonic() < stop:
+        vals, startns, step, hits = advance(vals, startns, step, upto + 1, upto + PBLOCK, mins)
+        upto += PBLOCK
+        if hits:
+            return n, hits[0][1], step, None, None, [m[1:] for m in mins]
+    return n, None, step, int(vals[0]), upto, [m[1:] for m in mins]
+
+def _ignoreint():
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+def run(starts, dbfile='riecaman.db', seconds=600, procs=None):
+    """Follow every unresolved start in a process pool, slice after slice, until interrupted"""
+    from multiprocessing import Pool
+    db = open_store(dbfile)
+    for n in starts:
+        record(db, n)
+    starts = set(starts)
+    with Pool(procs or os.cpu_count(), initializer=_ignoreint) as pool:
+        try:
+            while True:
+                todo = [row + (seconds,) for row in db.execute(
+                    'SELECT n, step, value, upto FROM starts WHERE length IS NULL') if row[0] in starts]
+                if not todo:
+                    break
+                for n, length, step, value, upto, mins in pool.imap_unordered(run_start, todo):
+                    record(db, n, length, step, value, upto, mins)
+                    if length is not None:
+                        print(f'{n}: {length} steps', flush=True)
+                    else:
+                        print(f'{n}: >{step} steps, last value {value}', flush=True)
+        except KeyboardInterrupt:
+            pool.terminate()
+
+def list_unresolved(listfile):
+    """The starts a list file (like list1000) still has as unknown, not counting the ones that join another"""
+    with open(listfile) as lf:
+        return [int(line.split()[0]) for line in lf if ' > ' in line and '=' not in line]
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description='Follow Riecaman start values in parallel, recording results in a database.')
+    parser.add_argument('starts', type=int, nargs='*', help='start values to follow')
+    parser.add_argument('-l', '--list', help='also follow the unresolved starts of this list file')
+    parser.add_argument('-d', '--db', default='riecaman.db')
+    parser.add_argument('-t', '--seconds', type=float, default=600, help='length of each slice of work on a start')
+    parser.add_argument('-p', '--procs', type=int, help='number of worker processes (default: all cores)')
+    parser.add_argument('--import', dest='seqfiles', nargs='+', metavar='SEQFILE',
+                        help='load riecamanN output files (seqN) instead')
+    args = parser.parse_args()
+    if args.seqfiles:
+        db = open_store(args.db)
+        for seqfile in args.seqfiles:
+            import_seq(db, seqfile)
+    else:
+        starts = args.starts + (list_unresolved(args.list) if args.list else [])
+        if not starts:
+            parser.error('no start values given')
+        run(starts, args.db, args.seconds, args.procs)
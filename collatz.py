@@ -1,3 +1,5 @@
+import numpy as np
+
 def colseq(n):
     while n > 1:
         if n % 2:
@@ -12,7 +14,7 @@ def colseq(n):
 
 def highest_seq(stop):
     """Return starting integer below stop for Collatz sequence reaching highest max point"""
-    return max(range(3, stop), key=lambda i : max(colseq(i)))
+    return 3 + int(np.argmax(peaks(stop)[3:]))
 
 # max(range(3,101), key=lambda i: max(colseq(i)) == 27
 # max(colseq(27)) == 9232
@@ -34,14 +36,249 @@ def iterlen(iterseq):
 
 def longest_seq(stop):
     """Return starting integer below stop for longest Collatz sequence"""
-    return max(range(3, stop), key=lambda i : iterlen(colseq(i)))
+    return 3 + int(np.argmax(stopping_times(stop)[3:]))
 
 # max(range(3,101), key=lambda i: iterlen(colseq(i)) == 97
 # iterlen(colseq(97)) == 118
 
+def _merge(n, ln, m, lm):
+    """Index of the first common term from the end, given the sequence lengths"""
+    # Line the two up at the same distance from 1; once they meet they agree from there on.
+    x, y = n, m
+    for _ in range(ln - lm):
+        x = 3*x + 1 if x % 2 else x // 2
+    for _ in range(lm - ln):
+        y = 3*y + 1 if y % 2 else y // 2
+    left = min(ln, lm)
+    while x != y:
+        x = 3*x + 1 if x % 2 else x // 2
+        y = 3*y + 1 if y % 2 else y // 2
+        left -= 1
+    # x is a common term with `left` more after it; it doesn't count if it's n or m itself
+    return min(left + 1, ln, lm)
+
 def wherematch(n, m):
     """Indices after which the Collatz sequences for m and n agree."""
-    ln = list(colseq(n))
-    lm = list(colseq(m))
-    ind = max(i for i in range(1, min(len(ln), len(lm))+1) if ln[-i:] == lm[-i:])
-    return len(ln) - ind, len(lm) - ind
+    ln = iterlen(colseq(n))
+    lm = iterlen(colseq(m))
+    if not ln or not lm:
+        raise ValueError('empty Collatz sequence')
+    ind = _merge(n, ln, m, lm)
+    return ln - ind, lm - ind
+
+# Previously this compared ln[-i:] == lm[-i:] for every i, quadratic in the lengths:
+#     ln = list(colseq(n))
+#     lm = list(colseq(m))
+#     ind = max(i for i in range(1, min(len(ln), len(lm))+1) if ln[-i:] == lm[-i:])
+# wherematch(63728127, 80049391): 1.5ms before, 0.54ms now
+
+# Stepping many sequences together in numpy, instead of one generator at a time.
+# Lanes that would overflow 64 bits are finished off with Python ints.
+
+U64LIMIT = (2**64 - 2) // 3  # largest n with 3n+1 fitting in uint64
+
+def lockstep(starts, below=None, compact=32):
+    """
+    Step the Collatz sequences for an array of starting values together.
+    Each lane stops on reaching 1, or if below is given, on dropping below its entry there.
+    Return arrays of the number of steps taken, the highest value reached (0 if none)
+    and the value stopped at. The last two are object arrays of ints if any lane outgrew uint64.
+    """
+    x = np.array(starts, dtype=np.uint64)
+    floor = np.full_like(x, 2) if below is None else np.array(below, dtype=np.uint64)
+    steps = np.zeros(len(x), dtype=np.uint32)
+    highs = np.zeros(len(x), dtype=np.uint64)
+    big = []
+    lanes = np.flatnonzero(x >= floor)
+    while lanes.size:
+        # work on the active lanes only, squeezing out finished ones every `compact` steps
+        lx, lf, ls, lh = x[lanes], floor[lanes], steps[lanes], highs[lanes]
+        live = np.ones(len(lanes), dtype=bool)
+        for _ in range(compact):
+            odd = (lx & 1).astype(bool)
+            over = odd & (lx > U64LIMIT) & live
+            if over.any():
+                big.extend(lanes[over].tolist())
+                live &= ~over
+            lx = np.where(live, np.where(odd, 3*lx + 1, lx >> 1), lx)
+            ls += live
+            np.maximum(lh, np.where(live, lx, 0), out=lh)
+            live &= lx >= lf
+            if not live.any():
+                break
+        x[lanes], steps[lanes], highs[lanes] = lx, ls, lh
+        lanes = lanes[live]
+    if big:
+        x, highs = x.astype(object), highs.astype(object)
+        for i in big:
+            n, stop, cnt, high = int(x[i]), int(floor[i]), int(steps[i]), int(highs[i])
+            while n >= stop:
+                n = 3*n + 1 if n % 2 else n // 2
+                cnt += 1
+                high = max(high, n)
+            x[i], steps[i], highs[i] = n, cnt, high
+    return steps, highs, x
+
+# lockstep(np.arange(1, 10**6)), full sequences: 2.6s (compacting every step: 5.3s)
+
+TABLEMAX = 1 << 27  # look up sequence lengths in the shared table for starts below this,
+TABLEDENSITY = 8  # as long as it needs at most this many new entries per start looked up
+
+def _step(x, lanes):
+    """Take one Collatz step in the given lanes of x"""
+    v = x[lanes]
+    odd = (v & 1).astype(bool)
+    if (v[odd] > U64LIMIT).any():
+        raise OverflowError('Collatz sequence exceeds 64 bits')
+    x[lanes] = np.where(odd, 3*v + 1, v >> 1)
+
+def wherematch_many(ns, ms):
+    """wherematch for arrays of pairs; returns the two arrays of indices"""
+    ns = np.array(ns, dtype=np.uint64)
+    ms = np.array(ms, dtype=np.uint64)
+    both = np.concatenate((ns, ms))
+    top = int(both.max(initial=0))
+    if top < len(_table.lengths) or (top < TABLEMAX and top <= TABLEDENSITY * len(both)):
+        lens = stopping_times(top + 1)[both].astype(np.int64)
+    else:
+        # each distinct start's sequence length is computed once
+        starts, inv = np.unique(both, return_inverse=True)
+        lens = lockstep(starts)[0].astype(np.int64)[inv]
+    ln, lm = lens[:len(ns)], lens[len(ns):]
+    if not (ln.all() and lm.all()):
+        raise ValueError('empty Collatz sequence')
+    x, y, left = ns.copy(), ms.copy(), np.minimum(ln, lm)
+    for z, ahead in ((x, ln - lm), (y, lm - ln)):
+        lanes = np.flatnonzero(ahead > 0)
+        for k in range(1, ahead.max(initial=0) + 1):
+            lanes = lanes[ahead[lanes] >= k]
+            _step(z, lanes)
+    lanes = np.flatnonzero(x != y)
+    while lanes.size:
+        _step(x, lanes)
+        _step(y, lanes)
+        left[lanes] -= 1
+        lanes = lanes[x[lanes] != y[lanes]]
+    ind = np.minimum(left + 1, np.minimum(ln, lm))
+    return ln - ind, lm - ind
+
+# wherematch_many for 10**6 random pairs below 10**7: 14s, 3s of which is filling the table
+
+# Trajectories merge quickly, so regenerating every one in full is mostly redundant.
+# Going upward from 2, the trajectory of i only has to be followed until it first
+# drops below i; the rest of it is already in the table.
+
+class CollatzTable:
+    """Sequence lengths (uint32) and peaks (uint64) of Collatz sequences, indexed by start"""
+    # For i < 2, colseq(i) is empty; those lengths and peaks are 0.
+    BLOCK = 1 << 20
+
+    def __init__(self):
+        self.lengths = np.zeros(2, dtype=np.uint32)
+        self.peaks = np.zeros(2, dtype=np.uint64)
+
+    def extend(self, stop):
+        """Fill in the table for all starting values below stop"""
+        lo = len(self.lengths)
+        if stop <= lo:
+            return
+        self.lengths = np.concatenate((self.lengths, np.zeros(stop - lo, dtype=np.uint32)))
+        self.peaks = np.concatenate((self.peaks, np.zeros(stop - lo, dtype=np.uint64)))
+        for blo in range(lo, stop, self.BLOCK):
+            self._fill(blo, min(blo + self.BLOCK, stop))
+
+    def _fill(self, lo, hi):
+        starts = np.arange(lo, hi, dtype=np.uint64)
+        # most lanes drop below their start within a few steps, so compact often
+        steps, highs, vals = lockstep(starts, below=starts, compact=4)
+        if highs.dtype == object:
+            raise OverflowError('Collatz sequence exceeds 64 bits')
+        # Now vals < starts; but vals may themselves be in this block, so resolve
+        # the ones whose drop point is known first, and repeat.
+        known = np.zeros(hi - lo, dtype=bool)
+        todo = np.arange(hi - lo)
+        while todo.size:
+            drop = vals[todo]
+            inblock = drop >= lo
+            ready = ~inblock
+            ready[inblock] = known[drop[inblock] - lo]
+            i, drop = todo[ready], drop[ready].astype(np.intp)
+            self.lengths[lo + i] = steps[i] + self.lengths[drop]
+            self.peaks[lo + i] = np.maximum(highs[i], self.peaks[drop])
+            known[i] = True
+            todo = todo[~ready]
+
+_table = CollatzTable()
+
+def stopping_times(stop):
+    """Array of Collatz sequence lengths iterlen(colseq(i)), for i below stop"""
+    _table.extend(stop)
+    return _table.lengths[:stop]
+
+def peaks(stop):
+    """Array of Collatz sequence peaks max(colseq(i)) for i below stop (0 for i < 2)"""
+    _table.extend(stop)
+    return _table.peaks[:stop]
+
+# max(range(3, 10**6), key=lambda i: iterlen(colseq(i))): 12.9s; with stopping_times: 0.45s
+# stopping_times(10**7): 3.2s; stopping_times(10**8): 25s (1.2GB of table)
+# longest_seq(10**8) == 63728127; highest_seq(10**8) == 80049391, peak 2185143829170100
+
+# Splitting a range of starts across processes. Each chunk is summarized in a
+# small record, and the records are merged at the end (in any order).
+
+from collections import namedtuple
+
+ScanRecord = namedtuple('ScanRecord', 'longest length highest peak hist')
+ScanRecord.__doc__ = """Start with the longest sequence and its length, start with the highest peak
+and the peak, and the histogram of sequence lengths (as an array), over some starts"""
+
+SCANTABLE = 1 << 22  # sequences in a scan are followed until they drop below this
+
+def scan_chunk(lo, hi):
+    """ScanRecord for starting values in [lo, hi)"""
+    # Only the bottom of the table is needed: it is cheap, and is shared with the
+    # workers if filled before the pool is started.
+    bound = min(lo, SCANTABLE)
+    stopping_times(bound)
+    steps, highs, ends = lockstep(np.arange(lo, hi, dtype=np.uint64),
+                                  below=np.full(hi - lo, bound, dtype=np.uint64))
+    ends = ends.astype(np.intp)
+    steps += _table.lengths[ends]
+    highs = np.maximum(highs, _table.peaks[ends])
+    i, j = int(np.argmax(steps)), int(np.argmax(highs))
+    return ScanRecord(lo + i, int(steps[i]), lo + j, int(highs[j]), np.bincount(steps))
+
+def merge_records(a, b):
+    """Combine ScanRecords for two sets of starts; ties go to the smaller start, like max()"""
+    if len(a.hist) < len(b.hist):
+        a, b = b, a
+    hist = a.hist.copy()
+    hist[:len(b.hist)] += b.hist
+    longest = min((a.longest, a.length), (b.longest, b.length), key=lambda r: (-r[1], r[0]))
+    highest = min((a.highest, a.peak), (b.highest, b.peak), key=lambda r: (-r[1], r[0]))
+    return ScanRecord(*longest, *highest, hist)
+
+def _scan_chunk(bounds):
+    return scan_chunk(*bounds)
+
+def scan(stop, procs=None, chunk=1<<20, progress=None):
+    """
+    ScanRecord for starting values in [3, stop), computed by a process pool;
+    .longest is longest_seq(stop) and .highest is highest_seq(stop).
+    progress(done, total) is called with the number of starts finished so far.
+    """
+    from multiprocessing import Pool
+    stopping_times(min(stop, SCANTABLE))
+    bounds = [(lo, min(lo + chunk, stop)) for lo in range(3, stop, chunk)]
+    done, total = 0, stop - 3
+    rec = None
+    with Pool(procs) as pool:
+        for r in pool.imap_unordered(_scan_chunk, bounds):
+            rec = r if rec is None else merge_records(rec, r)
+            done += sum(r.hist)
+            if progress:
+                progress(done, total)
+    return rec
+
+# On one core: scan(10**7) 13s, scan(10**8) 116s; it divides among however many there are.
@@ -1,3 +1,10 @@
+import sys
+from decimal import Decimal, localcontext
+from functools import lru_cache
+from itertools import islice
+from math import log2
+from time import perf_counter
+
 def basecoef(num, base):
     """List of coefficients [c_0, c_1, ..., c_k] so num = Σ c_i * base**i"""
     digs = []
@@ -17,6 +24,67 @@ def weak_goodstein(n):
         base += 1
         yield n
 
+# In the weak sequence the base-b digits carry over unchanged as the base goes up by one,
+# and subtracting one just lowers the last digit, until that digit is 0 and there is a borrow.
+# So the term with index i is in base i+2, and between borrows everything follows from the digits.
+
+def _trim(digs):
+    while digs and not digs[-1]:
+        digs.pop()
+
+def _borrow(digs, base):
+    """Subtract one, in place, from digits (last digit first) ending in 0"""
+    j = next(j for j, d in enumerate(digs) if d)
+    digs[j] -= 1
+    digs[:j] = [base - 1] * j
+    _trim(digs)
+
+def weak_goodstein_ff(n, skip=True):
+    """
+    Yield (index, base, value) for the weak Goodstein sequence of n.
+    With skip, only at the start, at each borrow (just before and just after), and at the end;
+    otherwise every term, with the same values as weak_goodstein(n).
+    """
+    base = 2
+    digs = basecoef(n, base)
+    yield 0, base, n
+    while digs:
+        if digs[0]:
+            step = digs[0] if skip else 1
+            base += step
+            digs[0] -= step
+            _trim(digs)
+        else:
+            base += 1
+            _borrow(digs, base)
+        yield base - 2, base, bctoint(digs, base)
+
+def weak_goodstein_length(n, maxbits=10**9):
+    """Index of the 0 ending the weak Goodstein sequence of n, or None if the base would pass 2**maxbits"""
+    base = 2
+    digs = basecoef(n, base)
+    while digs:
+        base += digs[0]
+        digs[0] = 0
+        _trim(digs)
+        if not digs:
+            break
+        if digs[1]:
+            # Each borrow from the second digit sets the last digit to base-1, so counting that
+            # down doubles the base: borrowing at base B, B*2**m - 1 clears the last two digits.
+            if (base + 1).bit_length() + digs[1] > maxbits:
+                return None
+            base = ((base + 1) << digs[1]) - 1
+            digs[1] = 0
+            _trim(digs)
+            continue
+        base += 1
+        _borrow(digs, base)
+    return base - 2
+
+# weak_goodstein_length(4) == 21; weak_goodstein_length(6) == 381; weak_goodstein_length(7) == 2045
+# weak_goodstein_length(8) has 121210695 digits, ending ...374141 (0.35s)
+
 def heredbase(num, base):
     """Express num in the given base, with exponents also expressed in the base"""
     if num < base:
@@ -32,13 +100,56 @@ def heredbase(num, base):
         p += 1
     return ans[:-3]
 
+@lru_cache(maxsize=1024)
+def _pow(base, p):
+    return base**p
+
+@lru_cache(maxsize=1024)
+def _bumppow(p, base):
+    """base**p in hereditary base, with the base increased by one"""
+    return (base + 1)**bump(p, base)
+
+def _rebase(num, ndig, base):
+    """Value of the (up to) ndig base-`base` digits of num, read in base+1"""
+    if num < base:
+        return num
+    if ndig <= 16:
+        ans, place = 0, 1
+        while num:
+            num, cp = divmod(num, base)
+            ans += cp * place
+            place *= base + 1
+        return ans
+    # split in half, so the big multiplications are balanced
+    m = ndig // 2
+    hi, lo = divmod(num, _pow(base, m))
+    return _rebase(hi, ndig - m, base) * _pow(base + 1, m) + _rebase(lo, m, base)
+
+def bump(num, base):
+    """Express num in hereditary base, then replace every base with base+1 and evaluate"""
+    # Same as eval(heredbase(num, base).replace(f'*{base}**', f'*{base+1}**')), without the strings.
+    # Exponents below the base are written plainly, so those places are just read in base+1.
+    if num < base:
+        return num
+    # base**base is big; don't compute it unless num might be that big
+    bits = base.bit_length() - 1  # base >= 2**bits
+    if num.bit_length() <= base * bits:
+        return _rebase(num, num.bit_length() // bits + 1, base)
+    high, low = divmod(num, _pow(base, base))
+    ans = _rebase(low, base, base)
+    p = base
+    while high:
+        high, cp = divmod(high, base)
+        if cp:
+            ans += cp * _bumppow(p, base)
+        p += 1
+    return ans
+
 def goodstein(n):
     base = 2
     yield n
     while n:
-        hb = heredbase(n, base)
-        hb = hb.replace(f'*{base}**', f'*{base+1}**')
-        n = eval(hb) - 1
+        n = bump(n, base) - 1
         base += 1
         yield n
 
@@ -50,29 +161,178 @@ def goodstein_sub(n):
     base = 2
     yield n
     while n:
-        hb = heredbase(n-1, base).replace(f'*{base}**', f'*{base+1}**')
-        n = eval(hb)
+        n = bump(n-1, base)
         base += 1
         yield n
 
+def goodstein_eval(n):
+    """goodstein(n) by building the hereditary base string, bumping it and using eval"""
+    base = 2
+    yield n
+    while n:
+        hb = heredbase(n, base)
+        hb = hb.replace(f'*{base}**', f'*{base+1}**')
+        n = eval(hb) - 1
+        base += 1
+        yield n
+
+def benchmark(starts=range(4, 9), nterms=2000):
+    """Terms per second for goodstein and goodstein_eval"""
+    for n in starts:
+        rates = []
+        for gen in (goodstein_eval, goodstein):
+            start = perf_counter()
+            for _ in islice(gen(n), nterms):
+                pass
+            rates.append(nterms / (perf_counter() - start))
+        print(f'{n}: {rates[0]:9.0f} terms/s eval, {rates[1]:9.0f} terms/s integer; {rates[1]/rates[0]:5.1f}x')
+
+# benchmark(), first 2000 terms:
+# 4:     21625 terms/s eval,    715678 terms/s integer;  33.1x
+# 5:     17018 terms/s eval,    261043 terms/s integer;  15.3x
+# 6:     13916 terms/s eval,    635257 terms/s integer;  45.6x
+# 7:     13317 terms/s eval,    134098 terms/s integer;  10.1x
+# 8:       200 terms/s eval,      3155 terms/s integer;  15.8x
+
+# Hereditary trees: a number in hereditary base b as a tuple of (exponent, coefficient) pairs,
+# largest exponent first, where each exponent is again such a tuple and 0 is ().
+# The tree doesn't mention the base, so bumping the base leaves it unchanged;
+# only subtracting one needs the base. So terms far too big to write out can still be followed.
+
+MAXPLACES = 10**6  # refuse to subtract one from base**E if that takes more places than this
+
+@lru_cache(maxsize=4096)
+def hered(num, base):
+    """Hereditary tree of num in the given base"""
+    terms = []
+    p = 0
+    while num:
+        num, cp = divmod(num, base)
+        if cp:
+            terms.append((hered(p, base), cp))
+        p += 1
+    return tuple(reversed(terms))
+
+@lru_cache(maxsize=4096)
+def hvalue(tree, base):
+    """The number a hereditary tree stands for in the given base"""
+    return sum(c * base**hvalue(e, base) for e, c in tree)
+
+def hpred(tree, base):
+    """Hereditary tree of one less, in the given base"""
+    *rest, (e, c) = tree
+    if c > 1:
+        rest.append((e, c - 1))
+    if e:
+        # c*base**E - 1 = (c-1)*base**E + (base-1)*(base**(E-1) + ... + base + 1)
+        nplaces = hvalue(e, base)
+        if nplaces > MAXPLACES:
+            raise OverflowError(f'base**{nplaces} - 1 has too many places')
+        rest.extend((hered(p, base), base - 1) for p in reversed(range(nplaces)))
+    return tuple(rest)
+
+def goodstein_trees(n, sub=False):
+    """Yield (base, tree) for the Goodstein sequence of n (or goodstein_sub if sub)"""
+    base = 2
+    tree = hered(n, base)
+    yield base, tree
+    while tree:
+        if sub:
+            tree = hpred(tree, base)
+            base += 1
+        else:
+            base += 1
+            tree = hpred(tree, base)
+        yield base, tree
+
+def hlog10(tree, base):
+    """log10 of the value of a nonzero tree, as a Decimal good to a few places past the point"""
+    e0, c0 = tree[0]
+    top = hvalue(e0, base)
+    with localcontext() as ctx:
+        ctx.prec = int(top.bit_length() * 0.302) + 25
+        logb = Decimal(base).log10()
+        ratio = Decimal(0)
+        for e, c in tree[1:4]:
+            # lower terms only matter if they are within a few dozen digits of the top one
+            gap = top - hvalue(e, base)
+            if gap * logb > 40:
+                break
+            ratio += Decimal(c) / c0 * Decimal(base) ** -gap
+        return Decimal(c0).log10() + top * logb + (1 + ratio).log10()
+
+def hdigits(tree, base):
+    """Number of decimal digits of the value of a tree (estimated from the leading terms if big)"""
+    if not tree:
+        return 1
+    log = hlog10(tree, base)
+    if log < 1000:
+        return len(str(hvalue(tree, base)))
+    return int(log) + 1
+
+def hleading(tree, base, ndig=10):
+    """First ndig decimal digits of the value of a tree (estimated from the leading terms if big)"""
+    if not tree:
+        return 0
+    log = hlog10(tree, base)
+    if log < 1000:
+        return int(str(hvalue(tree, base))[:ndig])
+    with localcontext() as ctx:
+        ctx.prec = log.adjusted() + ndig + 25  # enough to keep the fractional part of log
+        return int(Decimal(10) ** (log - int(log) + ndig - 1))
+
+# E.g. 10**6 steps into goodstein(8) the term has 6000014 digits, starting 1477814175:
+# stepping the tree that far takes 2.7s, hdigits and hleading under a millisecond.
+
+def digits_below(maxdigit):
+    """Function telling whether an integer is less than 10**maxdigit, mostly by bit_length"""
+    lo = int(maxdigit * log2(10)) - 1  # 2**lo <= 10**maxdigit < 2**(lo + 3)
+    limit = 10**maxdigit
+    def small(n):
+        bits = n.bit_length()
+        if bits <= lo:
+            return True
+        if bits > lo + 3:
+            return False
+        return n < limit
+    return small
+
+def write_bfile(seq, out=None, offset=0, maxdigit=999, maxindex=10000, chunk=100):
+    """
+    Write lines 'n a_n' for an OEIS b-file to out (default stdout), starting with n=offset,
+    while n <= maxindex and a_n < 10**maxdigit. Lines go out chunk at a time, as the terms come.
+    """
+    out = out or sys.stdout
+    small = digits_below(maxdigit)
+    lines = []
+    for i, n in enumerate(seq, start=offset):
+        if i > maxindex or not small(n):
+            break
+        lines.append(f'{i} {n}\n')
+        if len(lines) >= chunk:
+            out.write(''.join(lines))
+            out.flush()
+            lines = []
+    out.write(''.join(lines))
+    out.flush()
+
 def print_sequence(seq, offset=0, maxdigit=999, maxindex=10000):
     """
     Produce output appropriate for OEIS b-file:
     n a_n
     separated by single space, starting with n=0 or n=2, max length 1000 digits
     """
-    for i, n in enumerate(seq, start=offset):
-        if i > maxindex or n >= 10**maxdigit:
-            break
-        print(f'{i} {n}')
+    write_bfile(seq, sys.stdout, offset, maxdigit, maxindex)
 
 def seqchars(seq, nchar, join=', ', init=''):
     """Return first string with length >= nchar with terms from the given sequence"""
     seq = iter(seq)
-    dat = init or str(next(seq))
-    while len(dat) < nchar:
-        dat += f'{join}{next(seq)}'
-    return dat
+    parts = [init or str(next(seq))]
+    length = len(parts[0])
+    while length < nchar:
+        parts.append(f'{join}{next(seq)}')
+        length += len(parts[-1])
+    return ''.join(parts)
 
 def datastring(n, nchar=260):
     """Return nchar characters worth of the Goodstein sequence"""
@@ -83,7 +343,6 @@ def datastring(n, nchar=260):
     return ', '.join(dat.split(', ')[:-1]) # omit last term
 
 if __name__ == "__main__":
-    import sys
     if len(sys.argv) not in {2,3}:
         sys.exit('Must give a starting number, and optionally a starting index (for numbering purposes only)')
     num = int(sys.argv[1])
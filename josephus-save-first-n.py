@@ -9,27 +9,29 @@
 
 # submitted to OEIS as A343780
 
-import itertools
 
 def firstn(n, q):
     """Do the first n survive when eliminating every q-th person out of 2n?"""
-    circle = list(range(2*n))
-    i = 1
-    while len(circle) > n:
-        i = (i + q - 1) % len(circle)
-        if circle[i] > 0 and circle[i] <= n:
+    # Until one of them dies, the good guys sit in a fixed block of seats,
+    # so there is no need to actually remove anybody from a list.
+    # (See josephus.py for the list simulation and timings.)
+    i = 0
+    for m in range(2*n, n, -1):
+        i = (i + q - 1) % m
+        if i < n:
             return False
-        circle.pop(i)
     return True
 
+# Testing one q at a time is all Python overhead; josephus.leastq_np
+# tests a whole block of q with numpy and gives the same answers.
+from josephus import leastq_np
+
 vals = []
 
 for n in range(1,22):
-    for q in itertools.count(n+1):
-        if firstn(n, q):
-            print(f'{n:2}: {q}')
-            vals.append(q)
-            break
+    q = leastq_np(n)
+    print(f'{n:2}: {q}')
+    vals.append(q)
 
 # Graham, Knuth and Patashnik say "A non-rigorous argument suggests that a `random'
 # value of q will succeed with probability 1 / (2n C n) ~ sqrt(πn)/4^n,
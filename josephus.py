@@ -0,0 +1,153 @@
+"""
+Searching for A343780: the least q > n such that executing every q-th person
+out of a circle of 2n leaves the first n alive (Concrete Mathematics problem 1.21).
+See josephus-save-first-n.py for the background.
+"""
+import itertools
+import json
+import os
+from time import perf_counter, monotonic
+import numpy as np
+
+def firstn_slow(n, q):
+    """Do the first n survive when eliminating every q-th person out of 2n? (list simulation)"""
+    circle = list(range(2*n))
+    i = 0
+    while len(circle) > n:
+        i = (i + q - 1) % len(circle)
+        if circle[i] < n:
+            return False
+        del circle[i]
+    return True
+
+def firstn(n, q):
+    """Do the first n survive when eliminating every q-th person out of 2n?"""
+    # As long as nobody among the first n has been killed, they still occupy
+    # seats 0..n-1 and the bad guys fill the rest; so only the index matters.
+    i = 0
+    for m in range(2*n, n, -1):
+        i = (i + q - 1) % m
+        if i < n:
+            return False
+    return True
+
+def firstn_block(n, qlo, qhi):
+    """Array of all q in [qlo, qhi) which save the first n out of 2n, in increasing order"""
+    qs = np.arange(qlo, qhi, dtype=np.int64)
+    i = np.zeros_like(qs)
+    for m in range(2*n, n, -1):
+        i += (qs - 1) % m
+        i %= m
+        alive = i >= n
+        if not alive.all():
+            # most candidates die in the first few steps; keep only the survivors
+            qs, i = qs[alive], i[alive]
+            if not len(qs):
+                break
+    return qs
+
+def leastq(n, check=firstn):
+    """Least q > n which saves the first n out of 2n"""
+    return next(q for q in itertools.count(n+1) if check(n, q))
+
+def leastq_np(n, blocksize=1<<16):
+    """Least q > n which saves the first n out of 2n, testing blocksize candidates at once"""
+    for qlo in itertools.count(n+1, blocksize):
+        found = firstn_block(n, qlo, qlo + blocksize)
+        if len(found):
+            return int(found[0])
+
+def benchmark(nrange=range(20, 31), ntries=20000):
+    """Time both checkers on the first ntries candidate q for each n"""
+    for n in nrange:
+        times = []
+        for check in (firstn_slow, firstn):
+            start = perf_counter()
+            for q in range(n+1, n+1+ntries):
+                check(n, q)
+            times.append(perf_counter() - start)
+        print(f'{n:2}: {times[0]:6.3f}s list, {times[1]:6.3f}s index; {times[0]/times[1]:4.1f}x')
+
+# benchmark(), 20000 candidates each: list ~0.018s, index ~0.008s (2.0x-2.5x) for every n in 20..30
+# Almost every q dies in the first few eliminations, so building the list is the whole cost.
+# leastq(13) = 2504881:  3.46s list, 1.33s index
+# leastq(14) = 13482720: 14.0s list, 7.05s index
+# leastq_np, blocks of 2**16 (bigger blocks are no faster):
+# leastq_np(13): 0.15s, leastq_np(14): 0.45s, leastq_np(16) = 68468401: 3.5s, leastq_np(17) = 610346880: 30s
+
+def _firstq(args):
+    """Least q in [qlo, qhi) which saves the first n out of 2n, or None"""
+    n, qlo, qhi = args
+    found = firstn_block(n, qlo, qhi)
+    return int(found[0]) if len(found) else None
+
+def read_state(bfile, statefile):
+    """Next n to search, and where to start searching for its q, from a b-file and state file"""
+    n = 1
+    if os.path.exists(bfile):
+        with open(bfile) as bf:
+            for line in bf:
+                if line.strip():
+                    n = int(line.split()[0]) + 1
+    q = n + 1
+    if os.path.exists(statefile):
+        with open(statefile) as sf:
+            state = json.load(sf)
+        if state['n'] == n:
+            q = state['q']
+    return n, q
+
+def write_state(statefile, n, q):
+    """Record that every q' < q has been ruled out for n"""
+    tmp = statefile + '.tmp'
+    with open(tmp, 'wt') as sf:
+        json.dump({'n': n, 'q': q}, sf)
+    os.replace(tmp, statefile)
+
+def make_bfile(nmax, bfile='b343780.txt', statefile='b343780.state',
+               procs=None, chunk=1<<22, every=60):
+    """
+    Append 'n a(n)' lines to the b-file up through nmax, searching q in parallel.
+    Picks up after the last line of the b-file, and for the n in progress,
+    after the last q range recorded in the state file (saved every `every` seconds).
+    """
+    from multiprocessing import Pool
+    n, q = read_state(bfile, statefile)
+    procs = procs or os.cpu_count()
+    nchunk = 4 * procs
+    with Pool(procs) as pool:
+        while n <= nmax:
+            lastsave = monotonic()
+            found = None
+            while found is None:
+                # hand out a round of consecutive ranges; the first hit in order is the least q
+                ranges = [(n, q + j*chunk, q + (j+1)*chunk) for j in range(nchunk)]
+                found = next((f for f in pool.map(_firstq, ranges) if f is not None), None)
+                if found is None:
+                    q += nchunk * chunk
+                    if monotonic() - lastsave > every:
+                        write_state(statefile, n, q)
+                        lastsave = monotonic()
+            with open(bfile, 'at') as bf:
+                print(n, found, file=bf)
+            print(f'{n:2}: {found}', flush=True)
+            n += 1
+            q = n + 1
+            write_state(statefile, n, q)
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description='Generate a b-file for A343780, resuming any previous run.')
+    parser.add_argument('nmax', type=int, nargs='?', help='last n to compute')
+    parser.add_argument('-b', '--bfile', default='b343780.txt')
+    parser.add_argument('-s', '--state', default='b343780.state', help='checkpoint of q already scanned')
+    parser.add_argument('-p', '--procs', type=int, help='number of worker processes (default: all cores)')
+    parser.add_argument('-c', '--chunk', type=int, default=1<<22, help='q values per task')
+    parser.add_argument('--bench', action='store_true', help='compare the checkers instead')
+    args = parser.parse_args()
+    if args.bench:
+        benchmark()
+    elif args.nmax is None:
+        parser.error('nmax is required')
+    else:
+        make_bfile(args.nmax, args.bfile, args.state, args.procs, args.chunk)
@@ -0,0 +1,66 @@
+"""
+Exact sums of powers S_k(n) = 1**k + 2**k + ... + n**k.
+np.cumsum(np.arange(1, N)**k) wraps around silently once the sums pass 2**64
+(sopfr2.py was wrong from 77936 for cubes); this uses numpy only while it can't.
+"""
+from fractions import Fraction
+from functools import lru_cache
+from itertools import accumulate
+from math import comb, lcm
+import numpy as np
+
+@lru_cache(maxsize=None)
+def bernoulli(j):
+    """Bernoulli number B_j, with B_1 = +1/2"""
+    if j == 0:
+        return Fraction(1)
+    return 1 - sum(comb(j, i) * bernoulli(i) / (j - i + 1) for i in range(j))
+
+@lru_cache(maxsize=None)
+def faulhaber(k):
+    """Integer coefficients (highest power first, down to n**0) and denominator of S_k(n)"""
+    coeffs = [Fraction(comb(k + 1, j)) * bernoulli(j) / (k + 1) for j in range(k + 1)] + [Fraction(0)]
+    denom = lcm(*(c.denominator for c in coeffs))
+    return [int(c * denom) for c in coeffs], denom
+
+def sumpow(n, k):
+    """S_k(n), by Faulhaber's formula"""
+    coeffs, denom = faulhaber(k)
+    total = 0
+    for c in coeffs:
+        total = total * n + c
+    return total // denom
+
+class PowerSums:
+    """S_k(n) for one k, walking n upward; jumps elsewhere go through Faulhaber's formula"""
+    def __init__(self, k, n=0):
+        self.k = k
+        self.n = n
+        self.sum = sumpow(n, k)
+
+    def __call__(self, n):
+        return sumpow(n, self.k)
+
+    def advance(self):
+        """S_k(n+1), and move on to it"""
+        self.n += 1
+        self.sum += self.n ** self.k
+        return self.sum
+
+    def block(self, lo, hi):
+        """List of S_k(n) for lo <= n < hi, leaving the walk at hi - 1"""
+        if lo - 1 != self.n:
+            self.n, self.sum = lo - 1, sumpow(lo - 1, self.k)
+        if hi <= lo:
+            return []
+        last = sumpow(hi - 1, self.k)
+        if last < 1 << 64:
+            sums = (np.cumsum(np.arange(lo, hi, dtype=np.uint64) ** self.k) + np.uint64(self.sum)).tolist()
+        elif (hi - 1) ** self.k < 1 << 64:
+            # the terms still fit even if the sums don't
+            terms = (np.arange(lo, hi, dtype=np.uint64) ** self.k).tolist()
+            sums = list(accumulate(terms, initial=self.sum))[1:]
+        else:
+            sums = list(accumulate((n ** self.k for n in range(lo, hi)), initial=self.sum))[1:]
+        self.n, self.sum = hi - 1, last
+        return sums
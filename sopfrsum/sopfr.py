@@ -1,6 +1,7 @@
 #from numba import jit
 #import numpy as np
-from primefac import primefac
+#from primefac import primefac
+from sopfrsml import sopfr_sieve
 #import sympy
 #from sympy import factorint
 #from sympy.abc import i,m #,n
@@ -35,6 +36,9 @@ from primefac import primefac
 
 # Trial division by small primes (only less than n; otherwise, we can give up): 15s python
 # ditto, with c and gmp:                    02s
+# sopfrsml.sopfr_bounded (gcd with blocks of 32 primes first): 22s python
+# sopfrsml.sopfr_sieve (numpy S mod p for primes < 2**16, blocks of 1024 n): 15s python
+#   and at k 100, n from 200000: 3000 n in 3.0s, against 24s for sopfr_bounded
 
 #@njit 
 #def sumpow(n, m): 
@@ -66,10 +70,13 @@ from primefac import primefac
 for k in range(1,90):
 #    poly = summat(i**k, (i, 1, m)).as_poly()
     print(k)
-    sumpow = 1
-    for n in range(2,90000):
-        sumpow += n**k
-        if sum(primefac(sumpow)) == n:
+#    sumpow = 1
+#    for n in range(2,90000):
+#        sumpow += n**k
+    for n, sumpow, sopr in sopfr_sieve(k, 2, 90000):
+        if sopr == n:
+#        if sopfr_bounded(sumpow, n) == n:
+#        if sum(primefac(sumpow)) == n:
 #        if sum(primefac(int(summat(i**k, (i, 1, n))))) == n:
 #        if sum(primefac(sumpow(n, k))) == n:
 #        if sum(primefac(int(poly(n)))) == n:
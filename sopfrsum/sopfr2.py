@@ -1,6 +1,7 @@
 #from numba import njit
 import numpy as np
-from primefac import primefac
+from sopfrsml import sopfr_bounded
+from powersum import PowerSums
 
 # by doing cumsum up front, we take only 1m27s (instead of 1m36s)
 # for k = 1 to 10, n = 1 to 20000
@@ -8,12 +9,14 @@ from primefac import primefac
 # agh it totally breaks when it overflows a 64-bit int tho
 # like already for 3rd powers up to 77936 for example
 # or 4th powers up to 8566
+# powersum.PowerSums.block keeps the numpy cumsum only while the sums fit in 64 bits
 
 #@njit 
 #def sumpow(n, m): 
 #    return np.sum(np.arange(n+1)**m)
 
 for k in range(1,10):
-    for n,snp in enumerate(np.cumsum(np.arange(1,20000)**k).tolist(), 1):
-        if sum(primefac(snp)) == n:
+#    for n,snp in enumerate(np.cumsum(np.arange(1,20000)**k).tolist(), 1):
+    for n,snp in enumerate(PowerSums(k).block(1,20000), 1):
+        if sopfr_bounded(snp, n) == n:
             print(f'g(f({n},{k})) = {n}')
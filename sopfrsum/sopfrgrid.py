@@ -0,0 +1,82 @@
+"""
+Run the sopfr search over a grid of k and blocks of n in a process pool, like sopfrsml.c:
+report hits sopfr(S_k(n)) = n and near misses n-2 <= sopfr < n, and count the small and big ones.
+Finished cells are appended to a checkpoint file, so a rerun skips them.
+"""
+import json
+import os
+from powersum import sumpow
+from sopfrsml import sopfr_sieve
+
+def run_cell(cell):
+    """Search one (k, nlo, nhi) cell; returns its record for the checkpoint file"""
+    k, nlo, nhi = cell
+    hits, near = [], []
+    nsmall = nfound = 0
+    # sopfr_sieve keeps S_k(n) going incrementally within the cell, and only yields sopfr <= n
+    for n, sumpow, sopr in sopfr_sieve(k, nlo, nhi):
+        nfound += 1
+        if sopr < n - 2:
+            nsmall += 1
+        elif sopr < n:
+            near.append((n, sopr))
+        else:
+            hits.append(n)
+    return {'k': k, 'lo': nlo, 'hi': nhi, 'hits': hits, 'near': near,
+            'small': nsmall, 'big': nhi - nlo - nfound}
+
+def read_checkpoint(checkpoint):
+    """Records of the cells finished so far, keyed by (k, lo, hi)"""
+    done = {}
+    if os.path.exists(checkpoint):
+        with open(checkpoint) as cf:
+            for line in cf:
+                if line.strip():
+                    rec = json.loads(line)
+                    done[rec['k'], rec['lo'], rec['hi']] = rec
+    return done
+
+def summary(records):
+    """Print hits, near misses and counts per k, in the format of sopfrsml.c"""
+    byk = {}
+    for rec in sorted(records, key=lambda r: (r['k'], r['lo'])):
+        byk.setdefault(rec['k'], []).append(rec)
+    for k, recs in byk.items():
+        line = f'{k}'
+        # near misses and hits together in order of n, with the sums recomputed
+        found = sorted([(n, sopr) for rec in recs for n, sopr in rec['near']] +
+                       [(n, n) for rec in recs for n in rec['hits']])
+        for n, sopr in found:
+            line += f"\n{'Near miss: ' if sopr < n else ''}g(f({n}, {k})) = g({sumpow(n, k)}) = {sopr}"
+        if found:
+            line += '\n '
+        line += f"...{sum(r['small'] for r in recs)} small, {sum(r['big'] for r in recs)} big"
+        print(line)
+
+def grid(kmin, kmax, nmax, block=100000, checkpoint='sopfr-grid.jsonl', procs=None):
+    """Search k in [kmin, kmax] and 2 <= n <= nmax, in cells of block n, skipping finished cells"""
+    from multiprocessing import Pool
+    done = read_checkpoint(checkpoint)
+    cells = [(k, lo, min(lo + block, nmax + 1))
+             for k in range(kmin, kmax + 1) for lo in range(2, nmax + 1, block)]
+    todo = [cell for cell in cells if cell not in done]
+    # one pool for the whole run; workers are recycled now and then to keep memory in check
+    with Pool(procs or os.cpu_count(), maxtasksperchild=16) as pool, open(checkpoint, 'at') as cf:
+        for rec in pool.imap_unordered(run_cell, todo):
+            print(json.dumps(rec), file=cf, flush=True)
+            done[rec['k'], rec['lo'], rec['hi']] = rec
+            for n in rec['hits']:
+                print(f"g(f({n}, {rec['k']})) = g({sumpow(n, rec['k'])}) = {n}", flush=True)
+    summary(done[cell] for cell in cells)
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description='Search for sopfr(1**k + ... + n**k) = n over a grid of k and n, resuming any previous run.')
+    parser.add_argument('kmax', type=int, nargs='?', default=100)
+    parser.add_argument('nmax', type=int, nargs='?', default=1000000)
+    parser.add_argument('--kmin', type=int, default=1)
+    parser.add_argument('-b', '--block', type=int, default=100000, help='n per cell')
+    parser.add_argument('-c', '--checkpoint', default='sopfr-grid.jsonl', help='finished cells, one JSON record per line')
+    parser.add_argument('-p', '--procs', type=int, help='number of worker processes (default: all cores)')
+    args = parser.parse_args()
+    grid(args.kmin, args.kmax, args.nmax, args.block, args.checkpoint, args.procs)
@@ -0,0 +1,128 @@
+"""
+Sum of prime factors with repetition (sopfr, A001414), when we only care whether it is at most n.
+Python version of sopfrsml in sopfrsml.c: trial division by primes below n only,
+giving up as soon as the running sum passes n.
+"""
+from bisect import bisect_left
+from math import gcd, prod
+import numpy as np
+import primesieve
+from powersum import PowerSums
+
+BLOCK = 32  # primes are tried in blocks of this many, by one gcd with their product
+
+_primes = []
+_products = []
+_sieved = 1  # _primes holds all the primes up to here
+
+def primes_below(n):
+    """Cached list of the primes less than n (more of the list may be filled in than that)"""
+    global _sieved
+    if n > _sieved:
+        top = max(n, 2 * _sieved)
+        del _products[len(_primes) // BLOCK:]  # the last block may have been partial
+        _primes.extend(primesieve.primes(_sieved + 1, top))
+        _sieved = top
+        for i in range(len(_products) * BLOCK, len(_primes), BLOCK):
+            _products.append(prod(_primes[i:i+BLOCK]))
+    return _primes, bisect_left(_primes, n)
+
+def sopfr_bounded(value, n, sopr=0, start=0):
+    """sopfr(value) if that is at most n, otherwise None (sopr + the sopfr of what's left,
+    trying only primes from index start, a multiple of BLOCK, if the smaller ones are done)"""
+    primes, count = primes_below(n)
+    for b in range(start, count, BLOCK):
+        if value == 1:
+            break
+        g = gcd(value, _products[b // BLOCK])
+        if g == 1:
+            continue
+        for p in primes[b:min(b + BLOCK, count)]:
+            if g % p:
+                continue
+            while not value % p:
+                value //= p
+                sopr += p
+                if sopr > n:
+                    return None
+    # any factor left over is at least n; the sum could only be n if value was n
+    if value > 1:
+        return None if sopr + value > n else sopr + value
+    return sopr
+
+SIEVE = 1 << 16  # sopfr_sieve finds the prime factors below this with numpy (at most 1 << 16)
+PCHUNK = 1024  # primes per numpy pass, to bound memory
+
+def _powmod(base, k, mod):
+    """base**k % mod elementwise, for uint32 arrays with everything below 2**16"""
+    result = np.ones_like(base)
+    while k:
+        if k & 1:
+            result *= base
+            result %= mod
+        k >>= 1
+        if k:
+            base *= base
+            base %= mod
+    return result
+
+def sopfr_sieve(k, nstart, nstop, block=1024, sieve=SIEVE):
+    """
+    Yield (n, S, sopfr(S)) for S = 1**k + ... + n**k, nstart <= n < nstop, whenever that sopfr is at most n.
+    Rather than trial divide each S, track S mod p for every prime p below sieve across a
+    block of n at once; only the primes with residue 0 get divided out of the big numbers,
+    and only if what's left could still be made of primes in [sieve, n) is it trial divided.
+    """
+    assert sieve <= 1 << 16 and block <= 1 << 15
+    primes, _ = primes_below(max(nstop, sieve))
+    nsieve = bisect_left(primes, sieve) // BLOCK * BLOCK  # so sopfr_bounded can carry on from there
+    bigprime = primes[nsieve] if nsieve < len(primes) else nstop
+    sums = PowerSums(k, nstart - 1)
+    resid = np.zeros(nsieve, dtype=np.uint32)
+    active = 0  # primes whose residues are being kept, the ones below the n so far
+    for lo in range(nstart, nstop, block):
+        ns = np.arange(lo, min(lo + block, nstop), dtype=np.int64)
+        ns32 = ns.astype(np.uint32)
+        top = min(nsieve, bisect_left(primes, lo + len(ns)))
+        resid[active:top] = [sums.sum % p for p in primes[active:top]]
+        active = top
+        hitp, hitn = [np.zeros(0, dtype=np.int64)], [np.zeros(0, dtype=np.intp)]
+        for c in range(0, active, PCHUNK):
+            d = min(c + PCHUNK, active)
+            ps = np.array(primes[c:d], dtype=np.uint32)[:, None]
+            # S mod p for each n in the block; the sums stay below block * 2**16
+            rs = np.cumsum(_powmod(ns32 % ps, k, ps), axis=1, dtype=np.uint32)
+            rs += resid[c:d, None]
+            rs %= ps
+            resid[c:d] = rs[:, -1]
+            rows, cols = np.nonzero((rs == 0) & (ps < ns32))
+            hitp.append(ps[rows, 0].astype(np.int64))
+            hitn.append(cols)
+        hitp, hitn = np.concatenate(hitp), np.concatenate(hitn)
+        # each prime counted once is a lower bound on the sum
+        partial = np.zeros(len(ns), dtype=np.int64)
+        np.add.at(partial, hitn, hitp)
+        factors = [[] for _ in ns]
+        order = np.argsort(hitn, kind='stable')
+        for j, p in zip(hitn[order].tolist(), hitp[order].tolist()):
+            factors[j].append(p)
+        block_sums = sums.block(lo, lo + len(ns))
+        for j, (n, sumpow, lower) in enumerate(zip(ns.tolist(), block_sums, (partial <= ns).tolist())):
+            if not lower:
+                continue
+            value, sopr = sumpow, 0
+            for p in factors[j]:
+                while not value % p:
+                    value //= p
+                    sopr += p
+            if sopr > n:
+                continue
+            if value > 1:
+                # the rest is a product of primes >= bigprime, adding up to at most n - sopr
+                most = (n - sopr) // bigprime * (n - 1).bit_length()
+                if value.bit_length() > max(most, n.bit_length()):
+                    continue
+                sopr = sopfr_bounded(value, n, sopr, nsieve)
+                if sopr is None:
+                    continue
+            yield n, sumpow, sopr
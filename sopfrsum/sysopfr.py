@@ -2,11 +2,11 @@ import sympy
 from sympy.abc import i,n,m
 from sympy.utilities.lambdify import lambdify
 
-primefac = sympy.factorint
+from sopfrsml import sopfr_bounded
 
 sumpow = lambdify((n,m), sympy.summation(i**m, (i, 1, n)), 'numpy')
 
 for k in range(1,10):
     for n in range(2,20000):
-        if sum(primefac(sumpow(n,k), multiple=True)) == n:
+        if sopfr_bounded(int(sumpow(n,k)), n) == n:
             print(f'g(f({n},{k})) = {n}')